@@ -2,18 +2,15 @@
 Send syslog messages to Sentry as events.
 """
 
+import re
 import sys
-import enum
 import logging
+import functools
+import collections
 import argparse
 
 import syslog_rfc5424_parser
 
-import sentry_sdk
-from sentry_sdk.integrations import atexit
-from sentry_sdk.integrations import dedupe
-from sentry_sdk.integrations import logging as sentry_logging
-
 
 # Manage version through the VCS CI/CD process
 try:
@@ -26,26 +23,45 @@ if version is not None:  # pragma: no cover
 
 logger = logging.getLogger(__name__)
 
-
-class SyslogSeverityToPythonLevel(enum.IntEnum):
-    """
-    Map syslog severities to Python's logging levels.
-    """
-
-    emerg = logging.CRITICAL
-    alert = logging.CRITICAL
-    crit = logging.CRITICAL
-    err = logging.ERROR
-    warning = logging.WARNING
-    notice = logging.WARNING
-    info = logging.INFO
-    debug = logging.DEBUG
+INPUT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_EVENT_LEVEL = logging.ERROR
+
+
+# Map syslog severities to Python's logging levels
+_SEVERITY_LEVELS = {
+    "emerg": logging.CRITICAL,
+    "alert": logging.CRITICAL,
+    "crit": logging.CRITICAL,
+    "err": logging.ERROR,
+    "warning": logging.WARNING,
+    "notice": logging.WARNING,
+    "info": logging.INFO,
+    "debug": logging.DEBUG,
+}
+# Python logging levels indexed by syslog severity code
+_SEV_TO_LEVEL = [None] * len(syslog_rfc5424_parser.constants.SyslogSeverity)
+for _severity in syslog_rfc5424_parser.constants.SyslogSeverity:
+    _SEV_TO_LEVEL[_severity.value] = _SEVERITY_LEVELS[_severity.name]
+del _severity
+
+
+# Logging level names that are `logging` module attributes and round-trip through
+# `logging.getLevelName()`, the same names accepted by the checks below
+_VALID_LEVELS = {
+    name: level
+    for level, name in getattr(logging, "_levelToName", {}).items()
+    if getattr(logging, name, None) == level
+}
 
 
 def logging_level_type(level_name):
     """
     Lookup the logging level corresponding to the named level.
     """
+    if level_name in _VALID_LEVELS:
+        return _VALID_LEVELS[level_name]
+
+    # Fall back to looking up levels added since import and to explaining errors
     try:
         level = getattr(logging, level_name)
     except Exception as exc:
@@ -71,58 +87,110 @@ def logging_level_type(level_name):
     return level
 
 
-# Define command line options and arguments
-parser = argparse.ArgumentParser(description=__doc__.strip())
-parser.add_argument(
-    "--input-file",
-    "-i",
-    type=argparse.FileType("r"),
-    default=sys.stdin,
-    help="Take the syslog messages from this file, one per-line. (default: stdin)",
+# Parse only the RFC 5424 fields used when logging, mirroring the grammar of
+# syslog_rfc5424_parser without building its parse tree and message objects
+_SD_NAME = r'[^= \]"]{1,32}'
+_SD_PARAM = r' {0}="(?:[^"\\]|\\.)*"'.format(_SD_NAME)
+_SYSLOG_LINE_RE = re.compile(
+    r"<(?P<pri>[0-9]{1,3})>[1-9][0-9]{0,2} "
+    r"(?P<timestamp>-|[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}"
+    r"(?:\.[0-9]{1,6})?(?:Z|[+-][0-9]{2}:[0-9]{2})) "
+    r"(?P<hostname>[!-~]{1,255}) (?P<appname>[!-~]{1,48}) "
+    r"(?P<procid>[!-~]{1,128}) (?P<msgid>[!-~]{1,32}) "
+    r"(?P<sd>-|(?:\[" + _SD_NAME + "(?:" + _SD_PARAM + r")*\])+)"
+    r"(?: (?P<msg>.*))?",
+    re.DOTALL,
 )
-parser.add_argument(
-    "--event-level",
-    "-e",
-    type=logging_level_type,
-    default=logging.ERROR,
-    help=(
-        "Capture log messages of this level and above as Sentry events.  "
-        "All other events are captured as Sentry breadcrumbs. "
-        "(default: ERROR)"
-    ),
+_fullmatch_syslog_line = _SYSLOG_LINE_RE.fullmatch
+_SD_ELEMENT_RE = re.compile(
+    r"\[(" + _SD_NAME + ")((?:" + _SD_PARAM + r")*)\]", re.DOTALL
 )
-parser.add_argument(
-    "--sentry-environment",
-    "-t",
-    default="unspecified",
-    help=(
-        "Set environment tag for Sentry. "
-        "(default: unspecified)"
-    ),
-)
-parser.add_argument(
-    "sentry_dsn", help=("The DSN or client key for your Sentry project."),
+_SD_PARAM_RE = re.compile(" (" + _SD_NAME + r')="((?:[^"\\]|\\.)*)"', re.DOTALL)
+# Syslog facility names keyed by facility code
+_FACILITY_NAMES = {
+    facility.value: facility.name
+    for facility in syslog_rfc5424_parser.constants.SyslogFacility
+}
+
+
+# The parts of a syslog line needed for logging
+ParsedSyslogLine = collections.namedtuple(
+    "ParsedSyslogLine", ["severity", "facility", "appname", "msg", "syslog_fields"]
 )
 
 
-def log_syslog_line(syslog_line, event_level=parser.get_default("event_level")):
+def _parse_header(match):
     """
-    Parse an rfc 5424 syslog line and log it as a Python logging record.
+    Decode the severity code, facility name and app name of a matched syslog line.
+    """
+    pri = int(match.group("pri"))
+    return pri & 7, _FACILITY_NAMES.get(pri >> 3, "unknown"), match.group("appname")
+
+
+def _syslog_fields(match):
+    """
+    Collect the non-empty syslog fields not handled by the logging record itself.
+    """
+    timestamp, hostname, procid, msgid, sd = match.group(
+        "timestamp", "hostname", "procid", "msgid", "sd"
+    )
+    syslog_fields = {"timestamp": timestamp, "hostname": hostname}
+    if procid != "-":
+        syslog_fields["procid"] = int(procid) if procid.isdigit() else procid
+    if msgid != "-":
+        syslog_fields["msgid"] = msgid
+    if sd != "-":
+        sd_params = syslog_fields["sd"] = {}
+        for sd_id, sd_element_params in _SD_ELEMENT_RE.findall(sd):
+            sd_params.setdefault(sd_id, {}).update(
+                _SD_PARAM_RE.findall(sd_element_params)
+            )
+    return syslog_fields
+
+
+def parse_minimal(syslog_line):
+    """
+    Parse an rfc 5424 syslog line into only the parts needed for logging.
+
+    Returns a `ParsedSyslogLine` named tuple where `syslog_fields` holds the remaining
+    non-empty fields.
+    """
+    match = _fullmatch_syslog_line(syslog_line)
+    if match is None:
+        raise syslog_rfc5424_parser.ParseError("Unable to parse message", syslog_line)
+    return ParsedSyslogLine(
+        *_parse_header(match), match.group("msg"), _syslog_fields(match)
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_logger(facility, appname):
     """
-    syslog_msg = syslog_rfc5424_parser.SyslogMessage.parse(syslog_line)
-    syslog_msg_dict = syslog_msg.as_dict()
+    Return the logger for a syslog facility and app, avoiding the logging lock.
+    """
+    return logging.getLogger(f"{facility}.{appname}")
+
 
-    level = getattr(SyslogSeverityToPythonLevel, syslog_msg.severity.name).value
+def log_syslog_line(syslog_line, event_level=DEFAULT_EVENT_LEVEL):
+    """
+    Parse an rfc 5424 syslog line and log it as a Python logging record.
+
+    Returns nothing, use `parse_minimal()` to get the parsed parts of a line.
+    """
+    match = _fullmatch_syslog_line(syslog_line)
+    if match is None:
+        raise syslog_rfc5424_parser.ParseError("Unable to parse message", syslog_line)
+    severity, facility, appname = _parse_header(match)
+
+    level = _SEV_TO_LEVEL[severity]
+    syslog_logger = _get_logger(facility, appname)
+    if not syslog_logger.isEnabledFor(level):
+        # Skip collecting the remaining fields for records that would be dropped
+        return
+
+    syslog_fields = _syslog_fields(match)
     args = ()
     kwargs = {}
-    syslog_fields = {
-        key: value
-        for key, value in syslog_msg_dict.items()
-        if value is not None
-        and value != {}
-        and value != []
-        and key not in {"facility", "appname", "severity", "msg", "version"}
-    }
     if level >= event_level:
         # For Sentry events, the event["logentry"]["params"] key seems to be the
         # best user experience in the UI
@@ -132,30 +200,27 @@ def log_syslog_line(syslog_line, event_level=parser.get_default("event_level")):
         # included
         kwargs = dict(extra=syslog_fields)
 
-    logger.log(
-        level, syslog_msg.msg, *args, **kwargs
-    )
-    # original code:
-    # logging.getLogger("{facility}.{appname}".format(**syslog_msg_dict)).log(
-    #     level, syslog_msg.msg, *args, **kwargs
-    # )
-
-    return syslog_msg
+    syslog_logger.log(level, match.group("msg"), *args, **kwargs)
 
 
-def run(
-    input_file=parser.get_default("input_file"),
-    event_level=parser.get_default("event_level"),
-):
+def run(input_file=None, event_level=DEFAULT_EVENT_LEVEL):
     """
     The inner loop for sending syslog lines as events and breadcrumbs to Sentry.
 
-    Expects the Sentry Python logging integration to be initialized before being
-    called.
+    Lines may be read from either a binary or a text file, and stdin is read if no
+    `input_file` is given.  Expects the Sentry Python logging integration to be
+    initialized before being called.
     """
+    if input_file is None:
+        input_file = sys.stdin.buffer
     for syslog_line in input_file:
+        if isinstance(syslog_line, bytes):
+            # Decode each line read as bytes once, so that invalid UTF-8 from any
+            # one syslog source can't raise and stop all processing
+            syslog_line = syslog_line.decode("utf-8", errors="replace")
+        syslog_line = syslog_line.rstrip("\r\n")
         try:
-            log_syslog_line(syslog_line[:-1], event_level)
+            log_syslog_line(syslog_line, event_level)
         except Exception:
             logger.exception(
                 "Exception raised while tyring to log syslog line:\n%s", syslog_line
@@ -172,14 +237,11 @@ def process_syslog_fields(event, hint):
         return event
 
     event["platform"] = "syslog"
-    event["server_name"] = event["logentry"]["params"].pop(
-        "hostname", event["server_name"]
-    )
-    event["timestamp"] = event["logentry"]["params"].pop(
-        "timestamp", event["timestamp"]
-    )
+    params_pop = event["logentry"]["params"].pop
+    event["server_name"] = params_pop("hostname", event["server_name"])
+    event["timestamp"] = params_pop("timestamp", event["timestamp"])
 
-    for breadcrumb in event.get("breadcrumbs", []):
+    for breadcrumb in event.get("breadcrumbs", ()):
         breadcrumb["timestamp"] = breadcrumb["data"].pop(
             "timestamp", breadcrumb["timestamp"]
         )
@@ -187,14 +249,61 @@ def process_syslog_fields(event, hint):
     return event
 
 
+def _build_parser():
+    """
+    Define command line options and arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument(
+        "--input-file",
+        "-i",
+        # Read regular files in large blocks to cut down on `read()` syscalls, reads
+        # from pipes still return as soon as any lines are available
+        type=argparse.FileType("rb", bufsize=INPUT_BUFFER_SIZE),
+        default="-",
+        help="Take the syslog messages from this file, one per-line. (default: stdin)",
+    )
+    parser.add_argument(
+        "--event-level",
+        "-e",
+        type=logging_level_type,
+        default=DEFAULT_EVENT_LEVEL,
+        help=(
+            "Capture log messages of this level and above as Sentry events.  "
+            "All other events are captured as Sentry breadcrumbs. "
+            "(default: ERROR)"
+        ),
+    )
+    parser.add_argument(
+        "--sentry-environment",
+        "-t",
+        default="unspecified",
+        help=(
+            "Set environment tag for Sentry. "
+            "(default: unspecified)"
+        ),
+    )
+    parser.add_argument(
+        "sentry_dsn", help=("The DSN or client key for your Sentry project."),
+    )
+    return parser
+
+
 def main(args=None):
+    # Only import the Sentry SDK when running the console script, so that using
+    # `log_syslog_line()` or `run()` as a library doesn't pay its import cost
+    import sentry_sdk
+    from sentry_sdk.integrations import atexit
+    from sentry_sdk.integrations import dedupe
+    from sentry_sdk.integrations import logging as sentry_logging
+
     # Disable default stderr logging handler and handle all messages assuming filtering
     # of the minimum level for breadcrumbs was done in the rsyslog configuration.
     logging.basicConfig(handlers=[])
     logging.getLogger().setLevel(level=logging.NOTSET)
     logging.lastResort = logging.NullHandler()
 
-    args = parser.parse_args(args=args)
+    args = _build_parser().parse_args(args=args)
 
     atexit_integration = atexit.AtexitIntegration()
     dedupe_integration = dedupe.DedupeIntegration()
@@ -209,11 +318,8 @@ def main(args=None):
         environment=args.sentry_environment,
     )
 
-    kwargs = {
-        arg: value for arg, value in vars(args).items() if arg not in {"sentry_dsn","sentry_environment"}
-    }
     with args.input_file:
-        return run(**kwargs)
+        return run(input_file=args.input_file, event_level=args.event_level)
 
 
 main.__doc__ = __doc__
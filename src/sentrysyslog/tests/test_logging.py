@@ -5,6 +5,7 @@ sentry-syslog tests for integrating with Python's logging facility.
 import io
 import logging
 import unittest
+from unittest import mock
 
 import sentrysyslog
 from .. import tests
@@ -38,3 +39,73 @@ class SentrySyslogLoggingTests(unittest.TestCase):
             dir(logged.records[0]),
             "Logging record arguments missing syslog field",
         )
+
+    def test_logging_run_stdin(self):
+        """
+        The run loop reads syslog lines from stdin by default.
+        """
+        stdin_file = io.TextIOWrapper(io.BytesIO(tests.SYSLOG_INFO_LINES.encode()))
+
+        with self.assertLogs("cron.CROND", level=logging.INFO) as logged:
+            self.addCleanup(tests.cleanupBreadcrumbs)
+            with mock.patch("sys.stdin", stdin_file):
+                sentrysyslog.run()
+
+        self.assertEqual(len(logged.records), 1, "Wrong number of logging records")
+
+    def test_logging_binary(self):
+        """
+        The run loop also accepts syslog lines read as bytes with any line endings.
+        """
+        stdin_file = io.BytesIO()
+        stdin_file.write(tests.SYSLOG_INFO_LINES.replace("\n", "\r\n").encode())
+        stdin_file.seek(0)
+
+        with self.assertLogs("cron.CROND", level=logging.INFO) as logged:
+            self.addCleanup(tests.cleanupBreadcrumbs)
+            sentrysyslog.run(stdin_file)
+
+        self.assertEqual(len(logged.records), 1, "Wrong number of logging records")
+        self.assertEqual(
+            logged.records[0].msg,
+            "some_message",
+            "Wrong binary syslog line log record message",
+        )
+
+    def test_logging_invalid_encoding(self):
+        """
+        Syslog lines that aren't valid UTF-8 are logged with the bytes replaced.
+        """
+        stdin_file = io.BytesIO()
+        stdin_file.write(tests.SYSLOG_INFO_LINES.encode().replace(b"_", b"\xff"))
+        stdin_file.seek(0)
+
+        with self.assertLogs("cron.CROND", level=logging.INFO) as logged:
+            self.addCleanup(tests.cleanupBreadcrumbs)
+            sentrysyslog.run(stdin_file)
+
+        self.assertEqual(len(logged.records), 1, "Wrong number of logging records")
+        self.assertEqual(
+            logged.records[0].msg,
+            "some\ufffdmessage",
+            "Wrong invalid encoding syslog line log record message",
+        )
+
+    def test_logging_disabled(self):
+        """
+        Syslog lines below the enabled logging level are skipped before logging.
+        """
+        stdin_file = io.StringIO()
+        stdin_file.write(tests.SYSLOG_INFO_LINES)
+        stdin_file.seek(0)
+
+        logging.disable(logging.INFO)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        with mock.patch.object(logging.Logger, "log") as log:
+            with mock.patch.object(
+                sentrysyslog, "_syslog_fields", wraps=sentrysyslog._syslog_fields
+            ) as syslog_fields:
+                sentrysyslog.run(stdin_file)
+
+        log.assert_not_called()
+        syslog_fields.assert_not_called()
@@ -0,0 +1,68 @@
+"""
+sentry-syslog tests for parsing syslog lines.
+"""
+
+import unittest
+
+import syslog_rfc5424_parser
+
+import sentrysyslog
+from .. import tests
+
+
+class SentrySyslogParseTests(unittest.TestCase):
+    """
+    sentry-syslog tests for parsing syslog lines.
+    """
+
+    def assertParsedLikeLibrary(self, syslog_line):
+        """
+        Assert the minimal parser agrees with the full syslog parsing library.
+        """
+        syslog_msg = syslog_rfc5424_parser.SyslogMessage.parse(syslog_line)
+        syslog_msg_dict = syslog_msg.as_dict()
+        self.assertEqual(
+            sentrysyslog.parse_minimal(syslog_line),
+            (
+                syslog_msg.severity.value,
+                syslog_msg_dict["facility"],
+                syslog_msg.appname,
+                syslog_msg.msg,
+                {
+                    key: syslog_msg_dict[key]
+                    for key in ("timestamp", "hostname", "procid", "msgid", "sd")
+                    if syslog_msg_dict[key] is not None and syslog_msg_dict[key] != {}
+                },
+            ),
+            "Wrong minimal parsing of syslog line {!r}".format(syslog_line),
+        )
+
+    def test_parse_minimal(self):
+        """
+        The minimal parser extracts the same fields as the syslog parsing library.
+        """
+        syslog_lines = tests.SYSLOG_INFO_LINES + tests.SYSLOG_ALERT_LINES
+        for syslog_line in syslog_lines[:-1].split("\n"):
+            self.assertParsedLikeLibrary(syslog_line)
+
+        self.assertParsedLikeLibrary(
+            "<165>1 2003-10-11T22:14:15.003Z mymachine.example.com evntslog "
+            'abc ID47 [exampleSDID@32473 iut="3" eventSource="App\\"lication"]'
+            '[examplePriority@32473 class="high"][exampleSDID@32473 eventID="1011"]'
+        )
+        self.assertParsedLikeLibrary("<1>1 - - - - - - \nmulti-line message")
+
+        parsed = sentrysyslog.parse_minimal(tests.SYSLOG_INFO_LINES.split("\n", 1)[0])
+        self.assertEqual(parsed.msg, "some_message", "Wrong parsed syslog message")
+        self.assertEqual(parsed.appname, "CROND", "Wrong parsed syslog app name")
+
+    def test_parse_minimal_invalid(self):
+        """
+        The minimal parser rejects the lines the syslog parsing library rejects.
+        """
+        for syslog_line in tests.SYSLOG_INVALID_LINES[:-1].split("\n"):
+            with self.assertRaises(
+                syslog_rfc5424_parser.ParseError,
+                msg="Invalid syslog line parsed {!r}".format(syslog_line),
+            ):
+                sentrysyslog.parse_minimal(syslog_line)
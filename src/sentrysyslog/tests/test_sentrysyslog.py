@@ -7,6 +7,7 @@ import logging
 import io
 import tempfile
 import unittest
+from unittest import mock
 
 import sentrysyslog
 from .. import tests
@@ -59,6 +60,37 @@ class SentrySyslogCliTests(unittest.TestCase):
             result, "Wrong console script options return value",
         )
 
+    def test_cli_custom_level(self):
+        """
+        The command line script accepts logging levels added after import.
+        """
+        for patcher in (
+            mock.patch.object(logging, "__CUSTOM_LEVEL__", 25, create=True),
+            mock.patch.dict(logging._levelToName),
+            mock.patch.dict(logging._nameToLevel),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        logging.addLevelName(logging.__CUSTOM_LEVEL__, "__CUSTOM_LEVEL__")
+
+        with tempfile.NamedTemporaryFile() as input_file:
+            self.addCleanup(tests.cleanupBreadcrumbs)
+            with mock.patch.object(sentrysyslog, "run") as run:
+                sentrysyslog.main(
+                    args=[
+                        "--input-file={}".format(input_file.name),
+                        "--event-level=__CUSTOM_LEVEL__",
+                        tests.DSN_VALUE,
+                    ]
+                )
+
+        run.assert_called_once()
+        self.assertEqual(
+            run.call_args[1]["event_level"],
+            25,
+            "Wrong custom logging level --event-level option value",
+        )
+
     def test_cli_option_errors(self):
         """
         The command line script displays useful messages for invalid option values.